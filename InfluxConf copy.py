@@ -1,5 +1,3 @@
-from influxdb import InfluxDBClient
-
 # influx configuration - edit these
 ifuser = "grafana"
 ifpass = "solar"
@@ -7,6 +5,16 @@ ifdb   = "solar"
 ifhost = "192.168.0.134"
 ifport = 8086
 
+# UDP line-protocol port (0 = disabled, write over HTTP); see InfluxConf.py for server setup
+ifudp_port = 0
+
+# gzip-compress HTTP write bodies (server must accept Content-Encoding: gzip)
+ifgzip = True
+
+# retention policy for writes (None = database default) and HTTP timeout in seconds
+ifretention = None
+iftimeout = 10
+
 # device configuration - USE cu.* FOR MODBUS ON macOS
 SDM_PORT="/dev/cu.usbserial-FTB6SPL3"
 TRACER_PORT="/dev/cu.usbserial-FTB6SPL3"
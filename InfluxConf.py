@@ -1,5 +1,3 @@
-from influxdb import InfluxDBClient
-
 # influx configuration - edit these
 ifuser = "grafana"
 ifpass = "solar"
@@ -7,6 +5,17 @@ ifdb   = "solar"
 ifhost = "localhost"
 ifport = 8086
 
+# UDP line-protocol port (0 = disabled, write over HTTP). Points are sent with
+# nanosecond timestamps, so leave precision unset in the server's [[udp]] section
+ifudp_port = 0
+
+# gzip-compress HTTP write bodies (server must accept Content-Encoding: gzip)
+ifgzip = True
+
+# retention policy for writes (None = database default) and HTTP timeout in seconds
+ifretention = None
+iftimeout = 10
+
 # device configuration - USE cu.* FOR MODBUS ON macOS
 SDM_PORT="/dev/tty.usbserial-FTB6SPL3"
 TRACER_PORT="/dev/tty.usbserial-FTB6SPL3"
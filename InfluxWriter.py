@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+"""
+Buffered InfluxDB Writers
+Batches measurement points before handing them to InfluxDBClient.write_points
+"""
+
+import sys
+import time
+import threading
+from collections import deque
+
+
+class BatchedInfluxWriter:
+    """Client-side write buffer flushed from a background thread when full or aged out"""
+
+    # Longest wait between flush attempts while InfluxDB keeps failing, in seconds
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, client, max_points=5000, max_age=1.0, max_buffer=None, debug=0, on_error=None,
+                 **write_kwargs):
+        """Wrap an InfluxDBClient with a size/age bounded buffer
+
+        max_buffer bounds the points held while InfluxDB is unreachable; the oldest
+        are dropped first. A failed flush keeps its points and is retried with
+        exponential backoff; on_error is called with the points that get dropped.
+        write_kwargs (time_precision, retention_policy, ...) are passed to every
+        client.write_points call.
+        """
+        self.client = client
+        self.on_error = on_error
+        self.max_points = max_points
+        self.max_age = max_age
+        self.debug = debug
+        self.write_kwargs = {'time_precision': 's', **write_kwargs}
+        self.dropped = 0
+
+        self._buffer = deque(maxlen=max_buffer)
+        self._oldest = None
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="influx-writer", daemon=True)
+        self._thread.start()
+
+    def write_points(self, points, **kwargs):
+        """Queue points without blocking; per-call kwargs are ignored in favour of write_kwargs"""
+        lost = []
+        with self._cond:
+            maxlen = self._buffer.maxlen
+            if maxlen is not None:
+                overflow = len(self._buffer) + len(points) - maxlen
+                if overflow > 0:
+                    # The deque discards from the left as points are appended
+                    held = min(overflow, len(self._buffer))
+                    lost = [self._buffer[i] for i in range(held)] + list(points[:overflow - held])
+                    self.dropped += overflow
+                    print(f"WARNING: InfluxDB write buffer full, dropping {overflow} oldest point(s)", file=sys.stderr)
+            wake = not self._buffer
+            if wake:
+                # First point of a batch arms the age-based flush
+                self._oldest = time.monotonic()
+            self._buffer.extend(points)
+            if wake or len(self._buffer) >= self.max_points:
+                self._cond.notify()
+        if lost and self.on_error is not None:
+            self.on_error(lost)
+        return True
+
+    def _run(self):
+        """Flush whenever max_points are buffered or the oldest point is max_age old"""
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._buffer:
+                        now = time.monotonic()
+                        due = now if len(self._buffer) >= self.max_points else self._oldest + self.max_age
+                        # After a failed flush, hold off until the backoff expires
+                        due = max(due, self._retry_at)
+                        if due <= now:
+                            break
+                        self._cond.wait(due - now)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write all buffered points to InfluxDB"""
+        with self._flush_lock:
+            with self._cond:
+                points = list(self._buffer)
+                self._buffer.clear()
+
+            if not points:
+                return True
+
+            try:
+                self.client.write_points(points, batch_size=self.max_points, **self.write_kwargs)
+            except Exception as e:
+                self._backoff = min(self._backoff * 2 or self.max_age, self.MAX_BACKOFF)
+                print(f"ERROR: Failed to flush {len(points)} points to InfluxDB: {e}; "
+                      f"retrying in {self._backoff:.0f}s", file=sys.stderr)
+                self._requeue(points)
+                return False
+
+            self._backoff = 0.0
+            self._retry_at = 0.0
+
+            if self.debug > 0:
+                print(f"DEBUG: Flushed {len(points)} points to InfluxDB")
+            return True
+
+    def _requeue(self, points):
+        """Put the points of a failed flush back ahead of newer ones, dropping the oldest if full"""
+        with self._cond:
+            self._retry_at = time.monotonic() + self._backoff
+            maxlen = self._buffer.maxlen
+            room = len(points) if maxlen is None else max(0, maxlen - len(self._buffer))
+            lost = points[:len(points) - room] if room < len(points) else []
+            if lost:
+                self.dropped += len(lost)
+                print(f"WARNING: InfluxDB write buffer full, dropping {len(lost)} oldest point(s)", file=sys.stderr)
+            self._buffer.extendleft(reversed(points[len(lost):]))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        if lost and self.on_error is not None:
+            self.on_error(lost)
+
+    def close(self):
+        """Stop the background thread and flush whatever is still buffered"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        return self.flush()
+
+
+class UDPInfluxWriter:
+    """Lossy UDP writer that falls back to HTTP after repeated send failures"""
+
+    def __init__(self, udp_client, http_client, max_failures=3, debug=0):
+        """Route writes through udp_client until it fails max_failures times in a row
+
+        Write nanosecond points with time_precision='n' so the HTTP fallback agrees.
+        """
+        self.udp_client = udp_client
+        self.http_client = http_client
+        self.max_failures = max_failures
+        self.debug = debug
+        self.failures = 0
+
+    @property
+    def using_udp(self):
+        """Whether writes still go over UDP"""
+        return self.failures < self.max_failures
+
+    def write_points(self, points, **kwargs):
+        """Send points over UDP, or over HTTP once UDP has been given up on"""
+        if self.using_udp:
+            try:
+                self.udp_client.write_points(points, **kwargs)
+                self.failures = 0
+                return True
+            except OSError as e:
+                self.failures += 1
+                print(f"WARNING: UDP write failed ({self.failures}/{self.max_failures}): {e}", file=sys.stderr)
+                if not self.using_udp:
+                    print("WARNING: Falling back to HTTP writes", file=sys.stderr)
+
+        return self.http_client.write_points(points, **kwargs)
@@ -3,10 +3,173 @@
 # Full implementation of all available registers and functionality
 
 import sys
-import datetime
 import time
+import struct
+import array
+import contextlib
 import minimalmodbus
 
+
+# Maximum number of registers a single Modbus read may return (spec limit)
+MAX_READ_REGISTERS = 125
+
+# Lower bound for the serial read timeout, in seconds
+MIN_TIMEOUT = 0.05
+
+# macOS IOSSDATALAT ioctl (_IOW('T', 0, unsigned long)) and latency to request, in microseconds
+IOSSDATALAT = 0x80085400
+LOW_LATENCY_US = 1000
+
+# Status register decode tables
+_VOLT_STATUS = ('Normal', 'Overvolt', 'Under Volt', 'Low Volt Disconnect', 'Fault')
+_TEMP_STATUS = ('Normal', 'Over Temp', 'Low Temp')
+_INPUT_VOLT_STATUS = ('Normal', 'No power', 'Higher volt input', 'Input volt error')
+_CHARGING_STATUS = ('No charging', 'Float', 'Boost', 'Equalization')
+
+# NumPy module once imported, False if unavailable
+_np = None
+
+
+def _numpy():
+    """Import NumPy on first use, returning None when it is not installed"""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np or None
+
+
+def _decodeRegisters(regs, layout):
+    """Scale a register block by 1/100 per a (name, index, is_32bit) layout"""
+    # Plain Python: for blocks of ~20 registers NumPy's array setup costs more than it saves
+    return {
+        name: ((regs[idx + 1] << 16) | (regs[idx] & 0xFFFF)) / 100.0 if is32 else regs[idx] / 100.0
+        for name, idx, is32 in layout
+    }
+
+
+def _computeTimeout(baudrate, nregs, bytesize=8, stopbits=1):
+    """Derive a read timeout from the wire time of an nregs register read"""
+    # Request frame is 8 bytes; response is address, function, count, data, CRC
+    frame_bytes = 8 + 5 + 2 * nregs
+    char_bits = 1 + bytesize + stopbits
+    return max(MIN_TIMEOUT, (frame_bytes * char_bits / baudrate) * 3)
+
+
+def _buildRegisterSpans(registers, max_count=MAX_READ_REGISTERS):
+    """Group a {name: address} map into contiguous (start, names) spans"""
+    spans = []
+    start = prev = None
+    names = []
+    for name, address in sorted(registers.items(), key=lambda item: item[1]):
+        if names and (address - prev > 1 or address - start >= max_count):
+            spans.append((start, tuple(names)))
+            names = []
+        if not names:
+            start = address
+        names.append(name)
+        prev = address
+    if names:
+        spans.append((start, tuple(names)))
+    return spans
+
+
+class SolarTracerConnectionError(IOError):
+    """Raised when the tracer's serial port cannot be opened"""
+
+
+class BusController:
+    """One shared RS-485 serial port with a Modbus instrument per slave id"""
+
+    # Open buses keyed by port name
+    _buses = {}
+
+    # Serial settings per protocol specification
+    BAUDRATE = 115200
+    BYTESIZE = 8
+    STOPBITS = 1
+    # Base timeout for writes and bit reads (EEPROM write acks can be slow);
+    # register reads tighten it per call through SolarTracer._readTimeout
+    TIMEOUT = 2
+
+    @classmethod
+    def forPort(cls, port, debug=0):
+        """Return the shared bus for a port, creating it on first use"""
+        bus = cls._buses.get(port)
+        if bus is None:
+            bus = cls._buses[port] = cls(port, debug)
+        return bus
+
+    def __init__(self, port, debug=0):
+        """Track a serial port; it is opened by the first instrument on it"""
+        self.port = port
+        self.debug = debug
+        self.serial = None
+        self.slaves = set()
+        self._asyncLock = None
+
+    def instrument(self, slave_id):
+        """Create a Modbus instrument for slave_id on the shared serial port"""
+        # minimalmodbus caches serial ports by name, so every instrument shares one handle
+        instrument = minimalmodbus.Instrument(self.port, slave_id)
+        if instrument.serial is not self.serial:
+            self.serial = instrument.serial
+            self.configure()
+        instrument.mode = minimalmodbus.MODE_RTU
+        instrument.debug = False
+        self.slaves.add(slave_id)
+        return instrument
+
+    def configure(self):
+        """Apply the serial settings once for the shared port"""
+        self.serial.baudrate = self.BAUDRATE
+        self.serial.bytesize = self.BYTESIZE
+        self.serial.parity = minimalmodbus.serial.PARITY_NONE
+        self.serial.stopbits = self.STOPBITS
+        self.serial.timeout = self.TIMEOUT
+        self.setLowLatency()
+
+    def setLowLatency(self) -> bool:
+        """Drop the USB-serial latency timer so each Modbus turnaround is not held back"""
+        try:
+            if sys.platform.startswith('linux'):
+                # ASYNC_LOW_LATENCY via TIOCGSERIAL/TIOCSSERIAL
+                self.serial.set_low_latency_mode(True)
+            elif sys.platform == 'darwin':
+                import fcntl
+                fcntl.ioctl(self.serial.fileno(), IOSSDATALAT, struct.pack('L', LOW_LATENCY_US))
+            else:
+                return False
+        except (AttributeError, ImportError, IOError, ValueError) as e:
+            if self.debug > 0:
+                print("DEBUG: Could not enable low latency on", self.port, e)
+                if sys.platform.startswith('linux'):
+                    print("DEBUG: Try 'setserial %s low_latency'" % self.port)
+            return False
+
+        if self.debug > 0:
+            print("DEBUG: Low latency mode enabled on", self.port)
+        return True
+
+    def asyncLock(self):
+        """asyncio lock serializing awaitable transactions on this bus"""
+        if self._asyncLock is None:
+            import asyncio  # Imported on use: it is slow to load and cron runs never await
+            self._asyncLock = asyncio.Lock()
+        return self._asyncLock
+
+    def release(self, slave_id):
+        """Forget a slave, closing the port once no slave uses it"""
+        self.slaves.discard(slave_id)
+        if not self.slaves:
+            if self.serial is not None:
+                self.serial.close()
+            self._buses.pop(self.port, None)
+
+
 class SolarTracer:
     """Enhanced class representing a Tracer device with full Modbus protocol support"""
 
@@ -140,6 +303,52 @@ class SolarTracer:
         'battery_management_mode': 0x9070
     }
 
+    # Contiguous read spans over the holding registers (function code 3)
+    SETTING_SPANS = _buildRegisterSpans(SETTING_REGISTERS)
+
+    # Decoding layouts for the block reads: (field, offset, is 32-bit low/high pair)
+    RATED_LAYOUT = (
+        ('pv_rated_voltage', 0, False),
+        ('pv_rated_current', 1, False),
+        ('pv_rated_power', 2, True),
+        ('battery_rated_voltage', 4, False)
+    )
+
+    CURRENT_LAYOUT = (
+        ('PVvolt', 0, False),
+        ('PVamps', 1, False),
+        ('PVwatt', 2, True),
+        ('BAvolt', 4, False),
+        ('BAamps', 5, False),
+        ('BAwatt', 6, True),
+        ('DCvolt', 12, False),
+        ('DCamps', 13, False),
+        ('DCwatt', 14, True),
+        ('BAtemp', 16, False),
+        ('CTtemp', 17, False),
+        ('power_components_temp', 18, False),
+        ('BAperc', 19, False)  # Note: moved from regs[26] to regs[19]
+    )
+
+    STATS_LAYOUT = (
+        ('max_pv_voltage_today', 0, False),
+        ('min_pv_voltage_today', 1, False),
+        ('max_battery_voltage_today', 2, False),
+        ('min_battery_voltage_today', 3, False),
+        ('consumed_energy_today', 4, True),
+        ('consumed_energy_month', 6, True),
+        ('consumed_energy_year', 8, True),
+        ('total_consumed_energy', 10, True),
+        ('generated_energy_today', 12, True),
+        ('generated_energy_month', 14, True),
+        ('generated_energy_year', 16, True),
+        ('total_generated_energy', 18, True)
+    )
+
+    # printFullStatus row formats for the decoded fields; anything else uses DEFAULT_ROW_FMT
+    DEFAULT_ROW_FMT = '{:<25}: {}'
+    _ROW_FMT = {name: '{:<25}: {:.2f}' for name, _, _ in RATED_LAYOUT + CURRENT_LAYOUT + STATS_LAYOUT}
+
     # Coils (read-write) - 0x0002, 0x0005, 0x0006
     COIL_REGISTERS = {
         'manual_control_load': 0x0002,
@@ -162,39 +371,100 @@ class SolarTracer:
     BATTERY_LEAD_ACID = [0, 300, 300, 1620, 1500, 1500, 1460, 1440, 1380, 1630, 1260, 1220, 1200, 1110, 1060]
     BATTERY_LIFEPO4 = [0, 300, 300, 1500, 1460, 1420, 1400, 1380, 1380, 1320, 1240, 1200, 1160, 1080, 1040]
 
+    # Timeout used while probing optional register types
+    PROBE_TIMEOUT = 0.1
+
+    # Capability probe results, shared across instances keyed by (device, id)
+    _caps = {}
+
+    # Open tracers, reused per (device, id) instead of reopening the port
+    _instances = {}
+
+    def __new__(cls, device='/dev/tty.usbserial-FTB6SPL3', serialid=1, debug=0):
+        """Return the already-open tracer for this device and id, if any"""
+        instance = cls._instances.get((device, serialid))
+        if instance is None:
+            instance = super().__new__(cls)
+        return instance
+
     def __init__(self, device='/dev/tty.usbserial-FTB6SPL3', serialid=1, debug=0):
         """Initialize the SolarTracer with enhanced Modbus support"""
+        if getattr(self, 'connected', False):
+            # Reused instance: the port is already open and configured
+            return
+
         self.device = device
         self.id = serialid
         self.debug = debug
         self.connected = False
 
         try:
-            instrument = minimalmodbus.Instrument(self.device, self.id)
+            # Slaves sharing a port share one configured serial handle
+            self.bus = BusController.forPort(self.device, self.debug)
+            instrument = self.bus.instrument(self.id)
             if self.debug > 0:
                 print("DEBUG: successfully connected to", self.device)
-            
-            # Set instrument Serial settings per protocol specification
-            instrument.serial.baudrate = 115200
-            instrument.serial.bytesize = 8
-            instrument.serial.parity = minimalmodbus.serial.PARITY_NONE
-            instrument.serial.stopbits = 1
-            instrument.serial.timeout = 2
-            instrument.mode = minimalmodbus.MODE_RTU
-            instrument.debug = False
 
             self.instrument = instrument
+            # Bound once so the polling readers skip the attribute lookups
+            self._read_registers = instrument.read_registers
             self.connected = True
+            self.caps = self.probeCapabilities()
+            self._instances[(self.device, self.id)] = self
 
-        except IOError:
+        except IOError as e:
             self.connected = False
-            print("ERROR: Failed to connect to", self.device, file=sys.stderr)
-            sys.exit(1)
-
-    def __del__(self):
-        """Destruct the SolarTracer object"""
+            self.bus.release(self.id)
+            raise SolarTracerConnectionError(f"Failed to connect to {self.device}: {e}") from e
+
+    @classmethod
+    def connectWithRetry(cls, device='/dev/tty.usbserial-FTB6SPL3', serialid=1, debug=0, max_tries=5):
+        """Connect, retrying with exponential backoff (0.1 s, 0.2 s, ...) between attempts"""
+        for attempt in range(max_tries):
+            try:
+                return cls(device, serialid, debug)
+            except SolarTracerConnectionError as e:
+                if attempt == max_tries - 1:
+                    raise
+                delay = 0.1 * 2 ** attempt
+                print(f"WARNING: {e}; retrying in {delay:.1f}s", file=sys.stderr)
+                time.sleep(delay)
+
+    def probeCapabilities(self) -> dict:
+        """Probe once which optional register types the device answers"""
+        key = (self.device, self.id)
+        if key in self._caps:
+            return self._caps[key]
+
+        probes = {
+            'holding': lambda: self.instrument.read_register(0x9000, 0, 3),
+            'coil': lambda: self.instrument.read_bit(0x0002, 1),
+            'discrete': lambda: self.instrument.read_bit(0x2000, 2)
+        }
+        caps = {}
+        with self._timeout(self.PROBE_TIMEOUT):
+            for name, probe in probes.items():
+                try:
+                    probe()
+                    caps[name] = True
+                except (IOError, ValueError):
+                    caps[name] = False
+
+        if not caps['holding']:
+            print("INFO: Settings reading not supported on this device (no holding register access)", file=sys.stderr)
+        if not (caps['coil'] or caps['discrete']):
+            print("INFO: System status reading not supported on this device (no coil/discrete input access)", file=sys.stderr)
+        if self.debug > 0:
+            print("DEBUG: Device capabilities", caps)
+        self._caps[key] = caps
+        return caps
+
+    def close(self):
+        """Close the serial port and drop this tracer from the reuse cache"""
         if self.connected:
-            self.instrument.serial.close()
+            self.bus.release(self.id)
+            self.connected = False
+            self._instances.pop((self.device, self.id), None)
             if self.debug > 0: 
                 print("DEBUG: successfully disconnected", self.device)
 
@@ -205,19 +475,35 @@ class SolarTracer:
             stat = "connected"
         return f"{self.device}({self.id}): {stat}"
     
-    def getTimestamp(self):
-        """Get current timestamp from the system"""
-        localtime = time.localtime()
-        localstamp = time.strftime("%H:%M:%S", localtime)
-        timestamp = datetime.datetime.utcnow()
+    def getTimestamp(self) -> int:
+        """Get current timestamp from the system, in whole seconds since the epoch"""
+        timestamp = int(time.time())
         if self.debug > 0: 
+            localstamp = time.strftime("%H:%M:%S", time.localtime(timestamp))
             print("DEBUG: Local time", localstamp, ", UTC timestamp", timestamp)
         return timestamp
     
+    @contextlib.contextmanager
+    def _timeout(self, seconds):
+        """Temporarily override the serial read timeout"""
+        serial = self.instrument.serial
+        previous = serial.timeout
+        serial.timeout = seconds
+        try:
+            yield
+        finally:
+            serial.timeout = previous
+
+    def _readTimeout(self, nregs):
+        """Timeout context sized for a read of nregs registers"""
+        serial = self.instrument.serial
+        return self._timeout(_computeTimeout(serial.baudrate, nregs, serial.bytesize, serial.stopbits))
+
     def readReg(self, register, decimals=2, function_code=4) -> float:
         """Read a register from the Tracer with proper scaling"""
         try:
-            value = self.instrument.read_register(register, decimals, function_code)
+            with self._readTimeout(1):
+                value = self.instrument.read_register(register, decimals, function_code)
             if self.debug > 0: 
                 print("DEBUG: Successfully read from 0x%X: %f" % (register, value))
             return value
@@ -225,10 +511,23 @@ class SolarTracer:
             print("ERROR: Failed to read from 0x%X" % register, file=sys.stderr)
             return -1
 
+    def readRegisterGroup(self, span, function_code=4) -> dict:
+        """Read a contiguous register span in one transaction, keyed by name"""
+        start, names = span
+        try:
+            with self._readTimeout(len(names)):
+                regs = self._read_registers(start, len(names), function_code)
+            if self.debug > 0:
+                print("DEBUG: Successfully read %d registers from 0x%X" % (len(names), start))
+            return dict(zip(names, regs))
+        except IOError:
+            print("ERROR: Failed to read %d registers from 0x%X" % (len(names), start), file=sys.stderr)
+            return None
+
     def readCoil(self, address) -> bool:
         """Read a coil (discrete output)"""
         try:
-            value = self.instrument.read_bit(address)
+            value = self.instrument.read_bit(address, 1)  # Function code 1 for coils
             if self.debug > 0:
                 print("DEBUG: Successfully read coil 0x%X: %s" % (address, value))
             return value
@@ -247,6 +546,17 @@ class SolarTracer:
             print("ERROR: Failed to write coil 0x%X" % address, file=sys.stderr)
             return False
 
+    def writeCoils(self, address, values) -> bool:
+        """Write consecutive coils in one transaction (function code 15)"""
+        try:
+            self.instrument.write_bits(address, values)
+            if self.debug > 0:
+                print("DEBUG: Successfully wrote %d coils from 0x%X: %s" % (len(values), address, values))
+            return True
+        except IOError:
+            print("ERROR: Failed to write %d coils from 0x%X" % (len(values), address), file=sys.stderr)
+            return False
+
     def readDiscreteInput(self, address) -> bool:
         """Read a discrete input"""
         try:
@@ -260,13 +570,13 @@ class SolarTracer:
 
     def combine32BitValue(self, low_reg, high_reg) -> float:
         """Combine low and high 16-bit registers into 32-bit value"""
-        return (high_reg * 65536 + low_reg) / 100.0
+        return ((high_reg << 16) | (low_reg & 0xFFFF)) / 100.0
 
     def decodeBatteryStatus(self, status_value) -> dict:
         """Decode battery status register (0x3200)"""
         return {
-            'voltage_status': ['Normal', 'Overvolt', 'Under Volt', 'Low Volt Disconnect', 'Fault'][status_value & 0x0F],
-            'temperature_status': ['Normal', 'Over Temp', 'Low Temp'][((status_value >> 4) & 0x0F) % 3],
+            'voltage_status': _VOLT_STATUS[status_value & 0x0F],
+            'temperature_status': _TEMP_STATUS[((status_value >> 4) & 0x0F) % 3],
             'internal_resistance_abnormal': bool(status_value & 0x0100),
             'wrong_voltage_identification': bool(status_value & 0x8000)
         }
@@ -274,7 +584,7 @@ class SolarTracer:
     def decodeChargingStatus(self, status_value) -> dict:
         """Decode charging equipment status register (0x3201)"""
         return {
-            'input_voltage_status': ['Normal', 'No power', 'Higher volt input', 'Input volt error'][(status_value >> 14) & 0x03],
+            'input_voltage_status': _INPUT_VOLT_STATUS[(status_value >> 14) & 0x03],
             'charging_mosfet_short': bool(status_value & 0x2000),
             'charging_anti_reverse_short': bool(status_value & 0x1000),
             'anti_reverse_short': bool(status_value & 0x0800),
@@ -283,7 +593,7 @@ class SolarTracer:
             'load_short': bool(status_value & 0x0100),
             'load_mosfet_short': bool(status_value & 0x0080),
             'pv_input_short': bool(status_value & 0x0010),
-            'charging_status': ['No charging', 'Float', 'Boost', 'Equalization'][(status_value >> 2) & 0x03],
+            'charging_status': _CHARGING_STATUS[(status_value >> 2) & 0x03],
             'fault': bool(status_value & 0x0002),
             'running': bool(status_value & 0x0001)
         }
@@ -293,14 +603,10 @@ class SolarTracer:
         rated_data = {}
         try:
             # Read block from 0x3000 - only 5 registers that are available
-            regs = self.instrument.read_registers(0x3000, 5, 4)
+            with self._readTimeout(5):
+                regs = self._read_registers(0x3000, 5, 4)
             
-            rated_data = {
-                'pv_rated_voltage': regs[0] / 100.0,
-                'pv_rated_current': regs[1] / 100.0,
-                'pv_rated_power': self.combine32BitValue(regs[2], regs[3]),
-                'battery_rated_voltage': regs[4] / 100.0
-            }
+            rated_data = _decodeRegisters(regs, self.RATED_LAYOUT)
         except IOError as e:
             print(f"ERROR: Failed to read rated data registers: {e}", file=sys.stderr)
             return None  # Return None to indicate failure
@@ -316,23 +622,10 @@ class SolarTracer:
         
         try:
             # Read main real-time data block - only 20 registers from 0x3100 that are available
-            regs = self.instrument.read_registers(0x3100, 20, 4)
+            with self._readTimeout(20):
+                regs = self._read_registers(0x3100, 20, 4)
             
-            tracer_current = {
-                'PVvolt': regs[0] / 100.0,
-                'PVamps': regs[1] / 100.0,
-                'PVwatt': self.combine32BitValue(regs[2], regs[3]),
-                'BAvolt': regs[4] / 100.0,
-                'BAamps': regs[5] / 100.0,
-                'BAwatt': self.combine32BitValue(regs[6], regs[7]),
-                'DCvolt': regs[12] / 100.0,
-                'DCamps': regs[13] / 100.0,
-                'DCwatt': self.combine32BitValue(regs[14], regs[15]),
-                'BAtemp': regs[16] / 100.0,
-                'CTtemp': regs[17] / 100.0,
-                'power_components_temp': regs[18] / 100.0,
-                'BAperc': regs[19] / 100.0  # Note: moved from regs[26] to regs[19]
-            }
+            tracer_current = _decodeRegisters(regs, self.CURRENT_LAYOUT)
 
             # Note: Status registers (0x3200 series) are not available on this device
             # so we skip reading them to avoid errors
@@ -346,28 +639,26 @@ class SolarTracer:
             
         return tracer_current
 
+    def readCurrentSample(self):
+        """Read the real-time block as a CurrentSample, decoding fields only on access"""
+        try:
+            with self._readTimeout(20):
+                regs = self._read_registers(0x3100, 20, 4)
+            return CurrentSample(regs)
+        except IOError as e:
+            print(f"ERROR: Failed to read current data: {e}", file=sys.stderr)
+            return None  # Return None to indicate failure
+
     def readStats(self) -> dict:
         """Read all statistical parameters with enhanced coverage"""
         tracer_stats = {}
         
         try:
             # Read statistics block - only 20 registers from 0x3300 that are available
-            regs = self.instrument.read_registers(0x3300, 20, 4)
+            with self._readTimeout(20):
+                regs = self._read_registers(0x3300, 20, 4)
             
-            tracer_stats = {
-                'max_pv_voltage_today': regs[0] / 100.0,
-                'min_pv_voltage_today': regs[1] / 100.0,
-                'max_battery_voltage_today': regs[2] / 100.0,
-                'min_battery_voltage_today': regs[3] / 100.0,
-                'consumed_energy_today': self.combine32BitValue(regs[4], regs[5]),
-                'consumed_energy_month': self.combine32BitValue(regs[6], regs[7]),
-                'consumed_energy_year': self.combine32BitValue(regs[8], regs[9]),
-                'total_consumed_energy': self.combine32BitValue(regs[10], regs[11]),
-                'generated_energy_today': self.combine32BitValue(regs[12], regs[13]),
-                'generated_energy_month': self.combine32BitValue(regs[14], regs[15]),
-                'generated_energy_year': self.combine32BitValue(regs[16], regs[17]),
-                'total_generated_energy': self.combine32BitValue(regs[18], regs[19])
-            }
+            tracer_stats = _decodeRegisters(regs, self.STATS_LAYOUT)
             
         except IOError as e:
             print(f"ERROR: Failed to read statistics: {e}", file=sys.stderr)
@@ -378,21 +669,86 @@ class SolarTracer:
             
         return tracer_stats
 
+    async def _runAsync(self, method):
+        """Run a blocking read in the default executor, one bus transaction at a time"""
+        # RTU is single-master: reads still serialize, but other I/O can overlap them
+        import asyncio
+        async with self.bus.asyncLock():
+            return await asyncio.get_running_loop().run_in_executor(None, method)
+
+    async def readRatedDataAsync(self) -> dict:
+        """Awaitable readRatedData"""
+        return await self._runAsync(self.readRatedData)
+
+    async def readCurrentAsync(self) -> dict:
+        """Awaitable readCurrent"""
+        return await self._runAsync(self.readCurrent)
+
+    async def readStatsAsync(self) -> dict:
+        """Awaitable readStats"""
+        return await self._runAsync(self.readStats)
+
     def readAllSettings(self) -> dict:
         """Read all setting parameters"""
-        # Note: This device does not support reading from holding registers (0x9000 series)
-        # so we return an empty dict to indicate no settings are available
-        print("INFO: Settings reading not supported on this device (no holding register access)", file=sys.stderr)
-        return {}
+        if not self.caps['holding']:
+            # Probed once in __init__: no holding register access on this device
+            return {}
+
+        settings = {}
+        failed = 0
+        for span in self.SETTING_SPANS:
+            values = self.readRegisterGroup(span, 3)
+            if values is None:
+                # Keep the spans that did answer; readRegisterGroup reported this one
+                failed += 1
+                continue
+            settings.update(values)
+        if failed == len(self.SETTING_SPANS):
+            return None  # Return None to indicate failure
+        return settings
 
     def readSystemStatus(self) -> dict:
         """Read system status including coils and discrete inputs"""
-        # Note: This device does not support reading coils (0x0000 series) or discrete inputs (0x2000 series)
-        # so we return an empty dict to indicate no status information is available
-        print("INFO: System status reading not supported on this device (no coil/discrete input access)", file=sys.stderr)
-        return {}
-
-    def setBatterySettings(self, settings_list, battery_capacity=100, battery_voltage=12) -> int:
+        status = {}
+        if self.caps['coil']:
+            for name, address in self.COIL_REGISTERS.items():
+                status[name] = self.readCoil(address)
+        if self.caps['discrete']:
+            status['over_temperature_inside'] = self.readDiscreteInput(self.DISCRETE_INPUTS['over_temperature_inside'])
+            status['day_night'] = 'Night' if self.readDiscreteInput(self.DISCRETE_INPUTS['day_night']) else 'Day'
+        return status
+
+    def writeReadRegisters(self, write_address, values, read_address, count) -> list:
+        """Write and read back holding registers in one transaction (function code 23)"""
+        payload = struct.pack('>HHHHB', read_address, count, write_address, len(values), 2 * len(values))
+        payload += struct.pack('>%dH' % len(values), *values)
+        # minimalmodbus cannot predict FC23 response sizes and would read until the timeout,
+        # so frame the request here and read exactly address, function, count, data and CRC
+        instrument = self.instrument
+        request = minimalmodbus._embed_payload(instrument.address, instrument.mode, 23, payload.decode('latin1'))
+        with self._readTimeout(count):
+            raw = instrument._communicate(request, 5 + 2 * count)
+        response = minimalmodbus._extract_payload(raw, instrument.address, instrument.mode, 23).encode('latin1')
+        if len(response) != 1 + 2 * count or response[0] != 2 * count:
+            raise minimalmodbus.InvalidResponseError("Wrong FC23 response length: %r" % response)
+        return list(struct.unpack('>%dH' % count, response[1:]))
+
+    def writeVerifiedRegisters(self, address, values) -> list:
+        """Write holding registers and return what the device reads back"""
+        if self.caps.get('fc23') is not False:
+            try:
+                readback = self.writeReadRegisters(address, values, address, len(values))
+                self.caps['fc23'] = True
+                return readback
+            except minimalmodbus.IllegalRequestError:
+                # Device rejects FC23; remember and use separate write + read
+                self.caps['fc23'] = False
+
+        self.instrument.write_registers(address, values)
+        with self._readTimeout(len(values)):
+            return self._read_registers(address, len(values), 3)
+
+    def setBatterySettings(self, settings_list, battery_capacity=100, battery_voltage=12, verify=False) -> int:
         """Enhanced battery settings with voltage scaling"""
         new_settings = settings_list.copy()
         
@@ -407,7 +763,14 @@ class SolarTracer:
         try:
             if self.debug > 0: 
                 print("DEBUG: Writing new settings to %s(%d)" % (self.device, self.id))
-            self.instrument.write_registers(0x9000, new_settings)
+            if not verify:
+                self.instrument.write_registers(0x9000, new_settings)
+                return 0
+
+            readback = self.writeVerifiedRegisters(0x9000, new_settings)
+            if readback != new_settings:
+                print("ERROR: Settings read back from %s do not match: %s" % (self.device, readback), file=sys.stderr)
+                return -3
             return 0
         except IOError:
             print("ERROR: Failed to write settings to %s" % self.device, file=sys.stderr)
@@ -417,20 +780,30 @@ class SolarTracer:
         """Control load outputs via coils"""
         success = True
         success &= self.writeCoil(0x0002, manual_on)
-        success &= self.writeCoil(0x0005, test_mode)
-        success &= self.writeCoil(0x0006, force_on)
+        # 0x0005 and 0x0006 are adjacent; 0x0003-0x0004 are left untouched
+        success &= self.writeCoils(0x0005, [test_mode, force_on])
         return success
 
     def printBatterySettings(self):
         """Print battery settings in a formatted way"""
         settings = self.readAllSettings()
         print("\n=== Battery Settings ===")
+        if settings is None:
+            print("Failed to read settings.")
+            return
         for key, value in settings.items():
             if isinstance(value, float):
                 print(f"{key:<30}: {value:.2f}")
             else:
                 print(f"{key:<30}: {value}")
 
+    def _printRows(self, data):
+        """Print key/value rows using the precomputed row formats"""
+        row_fmt = self._ROW_FMT.get
+        default = self.DEFAULT_ROW_FMT
+        for key, value in data.items():
+            print(row_fmt(key, default).format(key, value))
+
     def printFullStatus(self):
         """Print comprehensive system status"""
         print("\n=== Solar Tracer Full Status ===")
@@ -438,36 +811,69 @@ class SolarTracer:
         print("\n--- Rated Data ---")
         rated = self.readRatedData()
         if rated:
-            for key, value in rated.items():
-                print(f"{key:<25}: {value}")
+            self._printRows(rated)
         else:
             print("Failed to read rated data.")
             
         print("\n--- Real-time Data ---")
         current = self.readCurrent()
         if current:
-            for key, value in current.items():
-                if isinstance(value, dict):
-                    print(f"{key}:")
-                    for subkey, subvalue in value.items():
-                        print(f"  {subkey:<20}: {subvalue}")
-                else:
-                    print(f"{key:<25}: {value}")
+            self._printRows(current)
         else:
             print("Failed to read current data.")
                 
         print("\n--- Statistics ---")
         stats = self.readStats()
         if stats:
-            for key, value in stats.items():
-                print(f"{key:<25}: {value}")
+            self._printRows(stats)
         else:
             print("Failed to read statistics.")
             
         print("\n--- System Status ---")
         status = self.readSystemStatus()
         if status:
-            for key, value in status.items():
-                print(f"{key:<25}: {value}")
+            self._printRows(status)
         else:
-            print("System status not available on this device.")
\ No newline at end of file
+            print("System status not available on this device.")
+
+
+class CurrentSample:
+    """Raw 0x3100 register block; fields are scaled only when accessed"""
+
+    __slots__ = ('raw',)
+
+    # Field name -> (register offset, is 32-bit low/high pair)
+    OFFSETS = {name: (idx, is32) for name, idx, is32 in SolarTracer.CURRENT_LAYOUT}
+
+    def __init__(self, regs):
+        """Keep the registers as a compact uint16 array"""
+        np = _numpy()
+        if np is not None:
+            self.raw = np.asarray(regs, dtype=np.uint16)
+        else:
+            self.raw = array.array('H', regs)
+
+    def __getattr__(self, name):
+        """Decode one field from the raw registers"""
+        try:
+            idx, is32 = CurrentSample.OFFSETS[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        raw = self.raw
+        if is32:
+            return ((int(raw[idx + 1]) << 16) | int(raw[idx])) / 100.0
+        return int(raw[idx]) / 100.0
+
+    def __getitem__(self, name):
+        """Dict-style field access"""
+        if name not in CurrentSample.OFFSETS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def keys(self):
+        """Field names, in readCurrent order"""
+        return CurrentSample.OFFSETS.keys()
+
+    def asDict(self) -> dict:
+        """Decode every field, as readCurrent returns them"""
+        return _decodeRegisters(self.raw.tolist(), SolarTracer.CURRENT_LAYOUT)
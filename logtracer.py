@@ -7,41 +7,181 @@ Supports all Modbus registers from LS-B Series Protocol V1.1
 
 import sys
 import time
-import json
 import argparse
-from datetime import datetime
-from influxdb import InfluxDBClient
-from SolarTracer import SolarTracer
+from collections import defaultdict
+from InfluxWriter import BatchedInfluxWriter, UDPInfluxWriter
 from InfluxConf import *
 
+# Characters escaped in line protocol measurement names and field keys
+_LINE_ESCAPES = str.maketrans({" ": "\\ ", ",": "\\,", "=": "\\="})
+
+# Heavy modules (influxdb, SolarTracer/minimalmodbus, json) are imported where first
+# needed, keeping cold start short for cron-driven single-shot runs
+
+# Debug point serializer, chosen on first use
+_dumps_impl = None
+
+
+def _dumps(obj):
+    """Dump a point as indented JSON for debug output; orjson is used when installed"""
+    global _dumps_impl
+    if _dumps_impl is None:
+        try:
+            import orjson
+            option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            _dumps_impl = lambda o: orjson.dumps(o, default=str, option=option).decode()
+        except ImportError:
+            import json
+            _dumps_impl = lambda o: json.dumps(o, indent=2, default=str)
+    return _dumps_impl(obj)
+
+# Shared HTTP client; its requests.Session keeps the connection alive between writes
+_IFCLIENT = None
+
+
+def _get_ifclient():
+    """Return the process-wide InfluxDB HTTP client, creating it on first use"""
+    global _IFCLIENT
+    if _IFCLIENT is None:
+        from influxdb import InfluxDBClient
+        try:
+            _IFCLIENT = InfluxDBClient(ifhost, ifport, ifuser, ifpass, ifdb, timeout=iftimeout, retries=3,
+                                       pool_size=4, gzip=ifgzip)
+        except TypeError:
+            # influxdb-python releases before gzip support
+            _IFCLIENT = InfluxDBClient(ifhost, ifport, ifuser, ifpass, ifdb, timeout=iftimeout, retries=3,
+                                       pool_size=4)
+    return _IFCLIENT
+
+
 class SolarDataLogger:
     """Enhanced solar data logger with comprehensive Modbus support"""
     
-    def __init__(self, tracer_port=TRACER_PORT, tracer_id=TRACER_ID, debug=0):
-        """Initialize the logger with tracer connection"""
+    # Data type -> (tracer reader, default measurement, field transformer, description),
+    # most important first; rated data and settings are rarely needed
+    _LOG_SPECS = {
+        "realtime": ("readCurrent", "solar_realtime", "flatten_nested_dict", "real-time data"),
+        "statistics": ("readStats", "solar_statistics", None, "statistics"),
+        "status": ("readSystemStatus", "solar_system_status", "_numericize_status", "system status"),
+        "rated": ("readRatedData", "solar_rated", None, "rated data"),
+        "settings": ("readAllSettings", "solar_settings", None, "settings")
+    }
+    
+    # Seconds to reuse static data (nameplate ratings, setpoints) before re-reading it
+    STATIC_TTL = 3600
+    
+    # Continuous mode write queue: bound, batch size and flush age in seconds
+    WRITE_QUEUE_SIZE = 1000
+    WRITE_BATCH_SIZE = 100
+    WRITE_FLUSH_AGE = 5.0
+    # Data types sent over UDP when a UDP port is set. UDP is at-most-once: a lost
+    # datagram is a lost reading, which 1 Hz realtime data tolerates since the next
+    # cycle supersedes it. Statistics, status, ratings and settings must persist,
+    # so they always go over HTTP. UDP points carry nanosecond timestamps, the
+    # listener's default precision, so the server's [[udp]] precision must stay unset.
+    UDP_TYPES = ("realtime",)
+    # String values become tags only while they stay low-cardinality
+    MAX_TAG_VALUES = 20
+    # Reconnect backoff (seconds), and how many all-failed cycles trip the tracer circuit breaker
+    RETRY_BASE = 1.0
+    RETRY_CAP = 60.0
+    BREAKER_THRESHOLD = 3
+    
+    # Stable numeric codes for status strings (Day/Night keep their original 0/1)
+    _STATUS_CODES = {"Day": 0, "Night": 1, "Normal": 2, "Fault": 3, "Float": 4, "Boost": 5, "Equalize": 6, "Overcharge": 7}
+    
+    def __init__(self, tracer_port=TRACER_PORT, tracer_id=TRACER_ID, debug=0, delta_tolerance=None,
+                 max_attempts=3, udp_port=ifudp_port):
+        """Initialize the logger with tracer connection
+        
+        With delta_tolerance set, each point only carries the fields that moved
+        by more than that amount since they were last written. Connections are
+        retried with backoff up to max_attempts times (None retries forever).
+        A udp_port sends UDP_TYPES over InfluxDB's UDP listener; see UDP_TYPES.
+        """
         self.debug = debug
+        self.delta_tolerance = delta_tolerance
+        # Points are built straight as line protocol; verbose debug keeps dicts for readable dumps
+        self.protocol = "json" if debug > 1 else "line"
         self.tracer = None
         self.ifclient = None
+        self.writer = None
+        self.udp_writer = None
+        self._status_ext = {}
+        # Static data type -> (last data read, monotonic time of that read)
+        self._static_cache = {"rated": (None, 0), "settings": (None, 0)}
+        # Data type -> {field: python type}, frozen from the first successful read
+        self._schema = {}
+        # Data type -> {field: last value written}, used by delta encoding
+        self._last = defaultdict(dict)
+        # Tags on every point, and the distinct values seen per string tag (cardinality guard)
+        self.tags = {"tracer_id": str(tracer_id), "port": str(tracer_port)}
+        self._tag_values = defaultdict(set)
+        # Field key -> escaped b"key=" prefix for _emit_line
+        self._key_bytes = {}
+        # Single-slot write thread: log_all_data's write overlaps the next cycle's reads
+        self._write_executor = None
+        self._pending_write = None
+        
+        self.tracer_port = tracer_port
+        self.tracer_id = tracer_id
         
         # Initialize tracer connection
         try:
-            self.tracer = SolarTracer(tracer_port, tracer_id, debug)
-            if self.debug > 0:
-                print(f"DEBUG: Connected to tracer: {self.tracer}")
+            self._retry(self._connect_tracer, "tracer", max_attempts)
         except Exception as e:
             print(f"ERROR: Failed to initialize tracer: {e}", file=sys.stderr)
             sys.exit(1)
         
         # Initialize InfluxDB connection
         try:
-            self.ifclient = InfluxDBClient(ifhost, ifport, ifuser, ifpass, ifdb)
-            # Test connection
-            self.ifclient.ping()
-            if self.debug > 0:
-                print(f"DEBUG: Connected to InfluxDB: {ifhost}:{ifport}")
+            self._retry(self._connect_influx, "InfluxDB", max_attempts)
         except Exception as e:
             print(f"ERROR: Failed to connect to InfluxDB: {e}", file=sys.stderr)
             sys.exit(1)
+
+        # Realtime writes go over UDP when configured (HTTP as the fallback); the rest stay on HTTP
+        self.writer = self.ifclient
+        if udp_port:
+            from influxdb import InfluxDBClient
+            udpclient = InfluxDBClient(ifhost, database=ifdb, use_udp=True, udp_port=udp_port)
+            self.udp_writer = UDPInfluxWriter(udpclient, self.ifclient, debug=debug)
+            if self.debug > 0:
+                print(f"DEBUG: Writing {', '.join(self.UDP_TYPES)} data to InfluxDB over UDP port {udp_port}")
+    
+    def _retry(self, connect, what, max_attempts):
+        """Call connect until it succeeds, backing off exponentially between attempts"""
+        delay = self.RETRY_BASE
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return connect()
+            except Exception as e:
+                if max_attempts is not None and attempt >= max_attempts:
+                    raise
+                print(f"WARNING: {what} connection failed (attempt {attempt}): {e}; retrying in {delay:.0f}s",
+                      file=sys.stderr)
+                time.sleep(delay)
+                delay = min(delay * 2, self.RETRY_CAP)
+    
+    def _connect_tracer(self):
+        """Open (or reopen) the tracer connection"""
+        from SolarTracer import SolarTracer
+        if self.tracer is not None:
+            self.tracer.close()
+            self.tracer = None
+        # Single attempt: _retry owns the backoff, so connectWithRetry's own retries would stack
+        self.tracer = SolarTracer(self.tracer_port, self.tracer_id, self.debug)
+        if self.debug > 0:
+            print(f"DEBUG: Connected to tracer: {self.tracer}")
+    
+    def _connect_influx(self):
+        """Connect to InfluxDB and check it answers"""
+        self.ifclient = _get_ifclient()
+        self.ifclient.ping()
+        if self.debug > 0:
+            print(f"DEBUG: Connected to InfluxDB: {ifhost}:{ifport}")
     
     def create_measurement_point(self, measurement_name, fields, tags=None, timestamp=None):
         """Create a properly formatted InfluxDB measurement point"""
@@ -59,251 +199,450 @@ class SolarDataLogger:
             
         return point
     
+    def _to_line(self, measurement, fields, timestamp, tags=None):
+        """Format one point as an InfluxDB line protocol string, or None if it has no fields"""
+        buf = bytearray()
+        if not self._emit_line(buf, measurement, fields, timestamp, tags):
+            return None
+        return buf[:-1].decode()
+    
+    def _emit_line(self, buf, measurement, fields, timestamp, tags=None):
+        """Append one point as line protocol to a bytearray, newline included
+        
+        Returns False, leaving buf unchanged, when no field has a writable value.
+        """
+        start = len(buf)
+        buf += measurement.translate(_LINE_ESCAPES).encode()
+        if tags:
+            for key, value in sorted(tags.items()):
+                if value:
+                    buf += b","
+                    buf += f"{key.translate(_LINE_ESCAPES)}={value.translate(_LINE_ESCAPES)}".encode()
+        key_bytes = self._key_bytes
+        sep = b" "
+        for key, value in fields.items():
+            prefix = key_bytes.get(key)
+            if prefix is None:
+                prefix = key_bytes[key] = key.translate(_LINE_ESCAPES).encode() + b"="
+            if value is True or value is False:
+                encoded = b"true" if value else b"false"
+            elif isinstance(value, int):
+                encoded = b"%di" % value
+            elif isinstance(value, float):
+                encoded = repr(value).encode()
+            elif isinstance(value, str):
+                encoded = b'"' + value.replace('\\', '\\\\').replace('"', '\\"').encode() + b'"'
+            else:
+                continue
+            buf += sep
+            buf += prefix
+            buf += encoded
+            sep = b","
+        if sep == b" ":
+            # A line without fields is rejected by InfluxDB
+            del buf[start:]
+            return False
+        buf += b" %d\n" % timestamp
+        return True
+    
     def flatten_nested_dict(self, data, prefix="", separator="_"):
-        """Flatten nested dictionaries for InfluxDB storage"""
+        """Flatten nested dictionaries for InfluxDB storage; returns (fields, tags)"""
         flattened = {}
+        tags = {}
+        stack = [(prefix, data)]
+        # Hoisted lookups for the per-field loop
+        _dict, _float, _str, _isinstance = dict, float, str, isinstance
+        _num = (int, float, bool)
+        push = stack.append
         
-        for key, value in data.items():
-            new_key = f"{prefix}{separator}{key}" if prefix else key
-            
-            if isinstance(value, dict):
-                flattened.update(self.flatten_nested_dict(value, new_key, separator))
-            elif isinstance(value, (int, float, bool)):
-                flattened[new_key] = value
+        while stack:
+            prefix, current = stack.pop()
+            for key, value in current.items():
+                new_key = f"{prefix}{separator}{key}" if prefix else key
+                cls = value.__class__
+                
+                if cls is _float:
+                    # Fast path: nearly every register value is a float
+                    flattened[new_key] = value
+                elif cls is _dict:
+                    push((new_key, value))
+                elif _isinstance(value, _num):
+                    flattened[new_key] = value
+                elif _isinstance(value, _str):
+                    # Convert string values to tags or numeric if possible
+                    try:
+                        flattened[new_key] = _float(value)
+                    except ValueError:
+                        # Store as tag instead of field for string values
+                        tags[new_key] = value
+                elif _isinstance(value, _dict):
+                    push((new_key, value))
+                else:
+                    # Skip unsupported data types
+                    if self.debug > 1:
+                        print(f"DEBUG: Skipping unsupported data type for {new_key}: {type(value)}")
+        
+        return flattened, tags
+    
+    def _bounded_tags(self, data_type, tags):
+        """Drop string tags whose distinct values exceed MAX_TAG_VALUES"""
+        bounded = {}
+        for key, value in tags.items():
+            seen = self._tag_values[(data_type, key)]
+            if value not in seen:
+                if len(seen) >= self.MAX_TAG_VALUES:
+                    if self.debug > 0:
+                        print(f"DEBUG: Not tagging {key}={value!r}: too many distinct values")
+                    continue
+                seen.add(value)
+            bounded[key] = value
+        return bounded
+    
+    def _writer_for(self, data_type):
+        """The UDP writer for lossy-tolerant data types, the HTTP writer otherwise"""
+        if self.udp_writer is not None and data_type in self.UDP_TYPES:
+            return self.udp_writer
+        return self.writer
+    
+    def write_points(self, points, description, writer=None, data_types=()):
+        """Write built points to InfluxDB in a single request
+        
+        On failure the cached state of data_types is dropped so their next points are written.
+        """
+        if writer is None:
+            writer = self.writer
+        try:
+            if isinstance(points, bytes):
+                # Pre-built line protocol goes straight to the HTTP API (gzipped by the client)
+                self.ifclient.request('write', 'POST', params={'db': ifdb, 'precision': 's', 'rp': ifretention},
+                                      data=points, expected_response_code=204)
+            else:
+                # Nanosecond UDP points, see UDP_TYPES
+                precision = 'n' if writer is self.udp_writer else 's'
+                writer.write_points(points, batch_size=5000, time_precision=precision,
+                                    retention_policy=ifretention, protocol=self.protocol)
+        except Exception as e:
+            print(f"ERROR: Failed to write {description} to InfluxDB: {e}", file=sys.stderr)
+            self._invalidate(data_types)
+            return False
+
+        if self.debug > 0:
+            if isinstance(points, bytes):
+                lines = points.count(b"\n")
+                print(f"SUCCESS: Logged {description} in {lines} point(s)")
+            elif self.protocol == "line":
+                print(f"SUCCESS: Logged {description} in {len(points)} point(s)")
+            else:
+                fields = sum(len(point["fields"]) for point in points)
+                print(f"SUCCESS: Logged {fields} {description} fields in {len(points)} point(s)")
+        return True
+
+    def _invalidate(self, data_types):
+        """Forget what was last built for data types whose write failed"""
+        for data_type in data_types:
+            if data_type in self._static_cache:
+                # Re-read and write static data on its next call instead of treating it as sent
+                self._static_cache[data_type] = (None, 0)
+            # The delta baseline assumed this write landed; send every field next time
+            self._last.pop(data_type, None)
+    
+    def _status_code(self, status):
+        """Numeric code for a status string, stable for the life of the process"""
+        code = self._STATUS_CODES.get(status)
+        if code is not None:
+            return code
+        # Unknown strings get codes from 1000 up, in order of first appearance
+        code = self._status_ext.get(status)
+        if code is None:
+            code = self._status_ext[status] = 1000 + len(self._status_ext)
+        return code
+    
+    def _numericize_status(self, status_data):
+        """Convert boolean/string status values to numbers for InfluxDB"""
+        numeric_status = {}
+        for key, value in status_data.items():
+            if isinstance(value, bool):
+                numeric_status[key] = 1 if value else 0
             elif isinstance(value, str):
-                # Convert string values to tags or numeric if possible
-                try:
-                    flattened[new_key] = float(value)
-                except ValueError:
-                    # Store as tag instead of field for string values
-                    pass
+                numeric_status[key] = self._status_code(value)
             else:
-                # Skip unsupported data types
-                if self.debug > 1:
-                    print(f"DEBUG: Skipping unsupported data type for {new_key}: {type(value)}")
-        
-        return flattened
+                numeric_status[key] = value
+        return numeric_status
     
-    def log_realtime_data(self, measurement_name="solar_realtime"):
-        """Log real-time solar data"""
+    def _coerce(self, data, schema):
+        """Cast known fields to their schema types, adding new fields to the schema; None if a cast fails"""
+        coerced = {}
         try:
-            current_data = self.tracer.readCurrent()
-            if not current_data:
-                if current_data is None:
-                    print("ERROR: Failed to read current data", file=sys.stderr)
-                else:
-                    print("WARNING: No real-time data received", file=sys.stderr)
-                return False
+            for key, value in data.items():
+                if value is None:
+                    continue
+                kind = schema.get(key)
+                if kind is None:
+                    # First sighting, e.g. a setting span that failed on earlier reads
+                    kind = schema[key] = type(value)
+                coerced[key] = kind(value)
+        except (TypeError, ValueError):
+            return None
+        return coerced
+    
+    def _delta(self, data_type, fields, tol=0.01):
+        """Keep only fields that changed by more than tol since they were last written"""
+        prev = self._last[data_type]
+        out = {}
+        for key, value in fields.items():
+            if key not in prev:
+                out[key] = value
+            elif isinstance(value, (int, float)) and isinstance(prev[key], (int, float)):
+                if abs(value - prev[key]) > tol:
+                    out[key] = value
+            elif value != prev[key]:
+                out[key] = value
+        # Compare against the last written value so slow drift is still emitted
+        prev.update(out)
+        if not out and fields:
+            # A point needs at least one field; resend one without moving its baseline
+            key = next(iter(fields))
+            out[key] = prev[key]
+        return out
+    
+    def build_point(self, data_type, measurement_name=None, timestamp=None, buf=None):
+        """Read one data type from the tracer and build its point
+        
+        Returns None on failure, and for static data that is still fresh or unchanged.
+        With a bytearray buf and line protocol, the point is appended to buf and buf
+        is returned.
+        """
+        reader, default_measurement, transformer, description = self._LOG_SPECS[data_type]
+        if measurement_name is None:
+            measurement_name = default_measurement
+        
+        static = data_type in self._static_cache
+        if static:
+            cached, read_at = self._static_cache[data_type]
+            now = time.monotonic()
+            if cached is not None and now - read_at < self.STATIC_TTL:
+                return None
+        
+        try:
+            data = getattr(self.tracer, reader)()
+            if data is None:
+                if static:
+                    self._static_cache[data_type] = (None, 0)
+                print(f"ERROR: Failed to read {description}", file=sys.stderr)
+                return None
+            if not data:
+                if static:
+                    self._static_cache[data_type] = (None, 0)
+                print(f"WARNING: No {description} received", file=sys.stderr)
+                return None
+            
+            if static:
+                self._static_cache[data_type] = (data, now)
+                if data == cached:
+                    if self.debug > 0:
+                        print(f"DEBUG: {description} unchanged, not written")
+                    return None
+            
+            tags = self.tags
+            if transformer:
+                data = getattr(self, transformer)(data)
+                if isinstance(data, tuple):
+                    data, extra_tags = data
+                    if extra_tags:
+                        tags = {**tags, **self._bounded_tags(data_type, extra_tags)}
+            
+            # Keep each field's type fixed so InfluxDB never sees a type conflict
+            schema = self._schema.get(data_type)
+            if schema is None:
+                self._schema[data_type] = {key: type(value) for key, value in data.items() if value is not None}
+            else:
+                data = self._coerce(data, schema)
+                if data is None:
+                    print(f"WARNING: Dropping {description} point with unexpected field types", file=sys.stderr)
+                    return None
             
-            # Flatten nested status data
-            flattened_data = self.flatten_nested_dict(current_data)
+            # UDP gives no delivery feedback, so a lost datagram could never reset the baseline
+            if self.delta_tolerance is not None and self._writer_for(data_type) is not self.udp_writer:
+                data = self._delta(data_type, data, self.delta_tolerance)
             
             # Create measurement point
-            point = self.create_measurement_point(measurement_name, flattened_data)
-            
-            if self.debug > 0:
-                print(f"DEBUG: Real-time data point: {json.dumps(point, indent=2, default=str)}")
-            
-            # Write to InfluxDB
-            self.ifclient.write_points([point])
+            if timestamp is None:
+                timestamp = self.tracer.getTimestamp()
+            if self._writer_for(data_type) is self.udp_writer:
+                # See UDP_TYPES
+                timestamp *= 1_000_000_000
+            if self.protocol == "line":
+                if buf is not None:
+                    start = len(buf)
+                    if not self._emit_line(buf, measurement_name, data, timestamp, tags):
+                        print(f"WARNING: No {description} fields to write", file=sys.stderr)
+                        return None
+                    if self.debug > 0:
+                        print(f"DEBUG: {description} point: {buf[start:-1].decode()}")
+                    return buf
+                point = self._to_line(measurement_name, data, timestamp, tags)
+                if point is None:
+                    print(f"WARNING: No {description} fields to write", file=sys.stderr)
+                    return None
+            elif not data:
+                print(f"WARNING: No {description} fields to write", file=sys.stderr)
+                return None
+            else:
+                point = self.create_measurement_point(measurement_name, data, tags=tags, timestamp=timestamp)
             
             if self.debug > 0:
-                print(f"SUCCESS: Logged {len(flattened_data)} real-time fields to {measurement_name}")
+                print(f"DEBUG: {description} point: {point if self.protocol == 'line' else _dumps(point)}")
                 
-            return True
+            return point
             
         except Exception as e:
-            print(f"ERROR: Failed to log real-time data: {e}", file=sys.stderr)
-            return False
+            print(f"ERROR: Failed to build {description}: {e}", file=sys.stderr)
+            return None
+    
+    def _log(self, data_type, measurement_name=None):
+        """Build and write a single data type"""
+        point = self.build_point(data_type, measurement_name)
+        if point is None:
+            # Cached or unchanged static data is not a failure
+            return data_type in self._static_cache and self._static_cache[data_type][0] is not None
+        return self.write_points([point], self._LOG_SPECS[data_type][3], self._writer_for(data_type),
+                                 (data_type,))
+    
+    def build_realtime_point(self, measurement_name="solar_realtime", timestamp=None):
+        """Build the real-time solar data point, or None on failure"""
+        return self.build_point("realtime", measurement_name, timestamp)
+    
+    def build_statistics_point(self, measurement_name="solar_statistics", timestamp=None):
+        """Build the statistical data point, or None on failure"""
+        return self.build_point("statistics", measurement_name, timestamp)
+    
+    def build_rated_point(self, measurement_name="solar_rated", timestamp=None):
+        """Build the rated specification data point, or None on failure"""
+        return self.build_point("rated", measurement_name, timestamp)
+    
+    def build_settings_point(self, measurement_name="solar_settings", timestamp=None):
+        """Build the system settings point, or None on failure"""
+        return self.build_point("settings", measurement_name, timestamp)
+    
+    def build_system_status_point(self, measurement_name="solar_system_status", timestamp=None):
+        """Build the system status point (coils and discrete inputs), or None on failure"""
+        return self.build_point("status", measurement_name, timestamp)
+    
+    def log_realtime_data(self, measurement_name="solar_realtime"):
+        """Log real-time solar data"""
+        return self._log("realtime", measurement_name)
     
     def log_statistics(self, measurement_name="solar_statistics"):
         """Log statistical data"""
-        try:
-            stats_data = self.tracer.readStats()
-            if not stats_data:
-                if stats_data is None:
-                    print("ERROR: Failed to read statistics data", file=sys.stderr)
-                else:
-                    print("WARNING: No statistics data received", file=sys.stderr)
-                return False
-            
-            # Create measurement point
-            point = self.create_measurement_point(measurement_name, stats_data)
-            
-            if self.debug > 0:
-                print(f"DEBUG: Statistics data point: {json.dumps(point, indent=2, default=str)}")
-            
-            # Write to InfluxDB
-            self.ifclient.write_points([point])
-            
-            if self.debug > 0:
-                print(f"SUCCESS: Logged {len(stats_data)} statistics fields to {measurement_name}")
-                
-            return True
-            
-        except Exception as e:
-            print(f"ERROR: Failed to log statistics: {e}", file=sys.stderr)
-            return False
+        return self._log("statistics", measurement_name)
     
     def log_rated_data(self, measurement_name="solar_rated"):
         """Log rated specification data (usually static, log less frequently)"""
-        try:
-            rated_data = self.tracer.readRatedData()
-            if not rated_data:
-                if rated_data is None:
-                    print("ERROR: Failed to read rated data", file=sys.stderr)
-                else:
-                    print("WARNING: No rated data received", file=sys.stderr)
-                return False
-            
-            # Create measurement point
-            point = self.create_measurement_point(measurement_name, rated_data)
-            
-            if self.debug > 0:
-                print(f"DEBUG: Rated data point: {json.dumps(point, indent=2, default=str)}")
-            
-            # Write to InfluxDB
-            self.ifclient.write_points([point])
-            
-            if self.debug > 0:
-                print(f"SUCCESS: Logged {len(rated_data)} rated fields to {measurement_name}")
-                
-            return True
-            
-        except Exception as e:
-            print(f"ERROR: Failed to log rated data: {e}", file=sys.stderr)
-            return False
+        return self._log("rated", measurement_name)
     
     def log_settings(self, measurement_name="solar_settings"):
         """Log system settings (usually static, log infrequently)"""
-        try:
-            settings_data = self.tracer.readAllSettings()
-            if not settings_data:
-                if settings_data is None:
-                    print("ERROR: Failed to read settings data", file=sys.stderr)
-                else:
-                    print("WARNING: No settings data received", file=sys.stderr)
-                return False
-            
-            # Create measurement point
-            point = self.create_measurement_point(measurement_name, settings_data)
-            
-            if self.debug > 0:
-                print(f"DEBUG: Settings data point: {json.dumps(point, indent=2, default=str)}")
-            
-            # Write to InfluxDB
-            self.ifclient.write_points([point])
-            
-            if self.debug > 0:
-                print(f"SUCCESS: Logged {len(settings_data)} settings fields to {measurement_name}")
-                
-            return True
-            
-        except Exception as e:
-            print(f"ERROR: Failed to log settings: {e}", file=sys.stderr)
-            return False
+        return self._log("settings", measurement_name)
     
     def log_system_status(self, measurement_name="solar_system_status"):
         """Log system status (coils and discrete inputs)"""
-        try:
-            status_data = self.tracer.readSystemStatus()
-            if not status_data:
-                print("WARNING: No system status data received", file=sys.stderr)
-                return False
-            
-            # Convert boolean values to integers for InfluxDB
-            numeric_status = {}
-            for key, value in status_data.items():
-                if isinstance(value, bool):
-                    numeric_status[key] = 1 if value else 0
-                elif isinstance(value, str):
-                    # Convert string status to numeric (Day=0, Night=1)
-                    if value == 'Night':
-                        numeric_status[key] = 1
-                    elif value == 'Day':
-                        numeric_status[key] = 0
-                    else:
-                        numeric_status[key] = hash(value) % 1000  # Simple hash for other strings
-                else:
-                    numeric_status[key] = value
-            
-            # Create measurement point
-            point = self.create_measurement_point(measurement_name, numeric_status)
-            
-            if self.debug > 0:
-                print(f"DEBUG: System status data point: {json.dumps(point, indent=2, default=str)}")
-            
-            # Write to InfluxDB
-            self.ifclient.write_points([point])
-            
-            if self.debug > 0:
-                print(f"SUCCESS: Logged {len(numeric_status)} system status fields to {measurement_name}")
-                
-            return True
-            
-        except Exception as e:
-            print(f"ERROR: Failed to log system status: {e}", file=sys.stderr)
-            return False
+        return self._log("status", measurement_name)
+    
+    def _submit_write(self, points, description, data_types=()):
+        """Write points on the background write thread once the previous write is done"""
+        self.flush()
+        if self._write_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="influx-write")
+        self._pending_write = self._write_executor.submit(self.write_points, points, description, None, data_types)
+    
+    def flush(self):
+        """Wait for the in-flight background write; returns whether it succeeded"""
+        pending, self._pending_write = self._pending_write, None
+        return pending.result() if pending is not None else True
     
     def log_all_data(self):
-        """Log all available data types"""
-        success_count = 0
-        total_attempts = 5
+        """Log all available data types in a single InfluxDB write
         
-        # Log real-time data (most important)
-        if self.log_realtime_data():
-            success_count += 1
-            
-        # Log statistics
-        if self.log_statistics():
-            success_count += 1
-            
-        # Log system status
-        if self.log_system_status():
-            success_count += 1
-            
-        # Log rated data (less frequently needed)
-        if self.log_rated_data():
-            success_count += 1
-            
-        # Log settings (least frequently needed)
-        if self.log_settings():
-            success_count += 1
+        The write runs in the background while the caller moves on to the next
+        cycle's Modbus reads (which stay serial); call flush() to wait for it.
+        """
+        total_attempts = len(self._LOG_SPECS)
+        
+        # One timestamp for the whole cycle so its points line up in InfluxDB
+        timestamp = self.tracer.getTimestamp()
+        
+        # HTTP line protocol points are built straight into one request body
+        buf = bytearray() if self.protocol == "line" else None
+        points, udp_points = [], []
+        http_types, udp_types = [], []
+        for data_type in self._LOG_SPECS:
+            if self._writer_for(data_type) is self.udp_writer:
+                point = self.build_point(data_type, timestamp=timestamp)
+                if point is not None:
+                    udp_points.append(point)
+                    udp_types.append(data_type)
+            else:
+                point = self.build_point(data_type, timestamp=timestamp, buf=buf)
+                if point is not None:
+                    http_types.append(data_type)
+                    if buf is None:
+                        points.append(point)
+        built = len(http_types) + len(udp_types)
         
         if self.debug > 0:
-            print(f"SUCCESS: Logged {success_count}/{total_attempts} data categories")
-            
-        return success_count > 0
+            print(f"SUCCESS: Built {built}/{total_attempts} data categories")
+        
+        if udp_points:
+            # A UDP send does not wait on the server, so it needs no background thread
+            self.write_points(udp_points, "UDP data", self.udp_writer, udp_types)
+        if buf:
+            self._submit_write(bytes(buf), "data", http_types)
+        elif points:
+            self._submit_write(points, "data", http_types)
+        return built > 0
     
     def run_single_log(self, data_type="realtime"):
         """Run a single logging operation"""
-        if data_type == "realtime":
-            return self.log_realtime_data()
-        elif data_type == "statistics":
-            return self.log_statistics()
-        elif data_type == "rated":
-            return self.log_rated_data()
-        elif data_type == "settings":
-            return self.log_settings()
-        elif data_type == "status":
-            return self.log_system_status()
+        if data_type in self._LOG_SPECS:
+            return self._log(data_type)
         elif data_type == "all":
             return self.log_all_data()
         else:
             print(f"ERROR: Unknown data type: {data_type}", file=sys.stderr)
             return False
     
+    def _on_batch_error(self, points):
+        """Batched writes do not say which data types were lost, so resend all state"""
+        self._invalidate(self._LOG_SPECS)
+    
     def run_continuous_log(self, interval=60, data_types=None):
         """Run continuous logging at specified interval"""
         if data_types is None:
             data_types = ["realtime", "statistics"]  # Default to most important data
+        if interval <= 0:
+            print(f"ERROR: Logging interval must be positive, got {interval}", file=sys.stderr)
+            return
         
         print(f"Starting continuous logging every {interval} seconds")
         print(f"Logging data types: {data_types}")
         
+        # Writes go through a background thread so a slow InfluxDB never stalls Modbus polling
+        direct_writer = self.writer
+        self.writer = BatchedInfluxWriter(direct_writer, max_points=self.WRITE_BATCH_SIZE,
+                                          max_age=self.WRITE_FLUSH_AGE, max_buffer=self.WRITE_QUEUE_SIZE,
+                                          debug=self.debug, on_error=self._on_batch_error,
+                                          retention_policy=ifretention,
+                                          protocol=self.protocol)
+        
         try:
+            # Cycles start at start + n * interval, so the period does not drift with work time
+            start = time.monotonic()
+            cycle = 0
+            failed_cycles = 0
+            _strftime, _localtime = time.strftime, time.localtime
             while True:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                timestamp = _strftime("%Y-%m-%d %H:%M:%S", _localtime())
                 print(f"\n[{timestamp}] Logging cycle started")
                 
                 success_count = 0
@@ -313,13 +652,35 @@ class SolarDataLogger:
                 
                 print(f"[{timestamp}] Logging cycle completed: {success_count}/{len(data_types)} successful")
                 
-                # Sleep for the specified interval
-                time.sleep(interval)
+                # Circuit breaker: stop polling a dead tracer and reconnect with backoff instead
+                failed_cycles = 0 if success_count else failed_cycles + 1
+                if failed_cycles >= self.BREAKER_THRESHOLD:
+                    print(f"WARNING: {failed_cycles} failed cycles in a row, reconnecting to tracer",
+                          file=sys.stderr)
+                    self._retry(self._connect_tracer, "tracer", None)
+                    failed_cycles = 0
+                    # Restart the schedule from the reconnect rather than replaying the outage
+                    start = time.monotonic() - cycle * interval
+                
+                # Sleep until the next cycle is due
+                cycle += 1
+                slack = start + cycle * interval - time.monotonic()
+                if slack < 0:
+                    # Run late cycles right away, but drop whole intervals that were missed
+                    skipped = int(-slack // interval)
+                    cycle += skipped
+                    print(f"WARNING: Logging cycle overran by {-slack:.2f}s, skipping {skipped} cycle(s)", file=sys.stderr)
+                    slack = start + cycle * interval - time.monotonic()
+                time.sleep(max(0, slack))
                 
         except KeyboardInterrupt:
             print("\nLogging stopped by user")
         except Exception as e:
             print(f"ERROR: Continuous logging failed: {e}", file=sys.stderr)
+        finally:
+            self.flush()
+            self.writer.close()
+            self.writer = direct_writer
     
     def print_current_data(self):
         """Print current data to console for debugging"""
@@ -362,6 +723,14 @@ class SolarDataLogger:
             print(f"ERROR: Failed to read data: {e}", file=sys.stderr)
 
 
+def _positive_int(value):
+    """argparse type for intervals: an integer of at least 1"""
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 def main():
     """Main function with command line argument support"""
     parser = argparse.ArgumentParser(description='Solar Tracer Data Logger')
@@ -371,18 +740,24 @@ def main():
                        default='single', help='Logging mode')
     parser.add_argument('--data-type', '-t', choices=['realtime', 'statistics', 'rated', 'settings', 'status', 'all'],
                        default='realtime', help='Data type to log (single mode only)')
-    parser.add_argument('--interval', '-i', type=int, default=60,
+    parser.add_argument('--interval', '-i', type=_positive_int, default=60,
                        help='Logging interval in seconds (continuous mode only)')
     parser.add_argument('--port', '-p', default=TRACER_PORT,
                        help='Serial port for tracer communication')
     parser.add_argument('--id', type=int, default=TRACER_ID,
                        help='Modbus device ID')
+    parser.add_argument('--delta', type=float, default=None, metavar='TOLERANCE',
+                       help='Only write fields that changed by more than TOLERANCE')
+    parser.add_argument('--udp-port', type=int, default=ifudp_port,
+                       help='InfluxDB UDP port for realtime writes (lossy; other data stays on HTTP)')
     
     args = parser.parse_args()
     
     # Initialize logger
     try:
-        logger = SolarDataLogger(args.port, args.id, args.debug)
+        logger = SolarDataLogger(args.port, args.id, args.debug, args.delta,
+                                 max_attempts=None if args.mode == 'continuous' else 3,
+                                 udp_port=args.udp_port)
     except Exception as e:
         print(f"FATAL: Failed to initialize logger: {e}", file=sys.stderr)
         sys.exit(1)
@@ -391,6 +766,7 @@ def main():
     if args.mode == 'single':
         print(f"Running single log operation: {args.data_type}")
         success = logger.run_single_log(args.data_type)
+        success = logger.flush() and success
         sys.exit(0 if success else 1)
         
     elif args.mode == 'continuous':
@@ -409,16 +785,17 @@ def main():
 def simple_log():
     """Simple logging function for backward compatibility"""
     try:
+        from SolarTracer import SolarTracer
         tracer = SolarTracer(TRACER_PORT, TRACER_ID, debug=0)
         measurement_name = "solar"
         
         # Get real-time data using original method
         current_data = tracer.readCurrent()
+        if current_data is None:
+            print("ERROR: Failed to read current data from tracer", file=sys.stderr)
+            return False
         if not current_data:
-            if current_data is None:
-                print("ERROR: Failed to read current data from tracer", file=sys.stderr)
-            else:
-                print("WARNING: No current data received from tracer", file=sys.stderr)
+            print("WARNING: No current data received from tracer", file=sys.stderr)
             return False
         
         # Create InfluxDB point in original format
@@ -433,8 +810,7 @@ def simple_log():
         print(body_solar)
         
         # Connect to InfluxDB and write
-        ifclient = InfluxDBClient(ifhost, ifport, ifuser, ifpass, ifdb)
-        ifclient.write_points(body_solar)
+        _get_ifclient().write_points(body_solar, time_precision='s', retention_policy=ifretention)
         
         return True
         